@@ -13,6 +13,17 @@ import pipeline
 
 st.set_page_config(page_title="Processa planilha para o Sienge", page_icon="📊", layout="wide")
 
+
+@st.cache_data(show_spinner=False)
+def load_sheet_rows(file_bytes: bytes, sheet_name: str) -> list[list]:
+    """Parse a sheet once into plain value rows (from row 1).
+
+    Cached on the file contents + sheet, so preview and pipeline reruns reuse
+    the same parse instead of re-reading the workbook.
+    """
+    return [list(row) for row in pipeline.iter_sheet_rows(BytesIO(file_bytes), sheet_name)]
+
+
 st.title("📊 Processa planilha para o Sienge")
 st.markdown("""
 Faça o upload de uma planilha para processar a hierarquia de itens.
@@ -76,12 +87,18 @@ if uploaded_file is not None:
         
     start_row = st.number_input("Linha Inicial de Dados", min_value=1, value=def_start)
 
-    # Preview
+    # Parse the selected sheet once; preview and pipeline share these rows
+    sheet_rows = None
     if selected_sheet:
         try:
-            # Reset pointer for preview
-            uploaded_file.seek(0)
-            df_preview = pd.read_excel(uploaded_file, sheet_name=selected_sheet, header=None, skiprows=start_row-1, nrows=5)
+            sheet_rows = load_sheet_rows(uploaded_file.getvalue(), selected_sheet)
+        except Exception as e:
+            st.error(f"Erro ao ler a aba: {e}")
+
+    # Preview
+    if sheet_rows is not None:
+        try:
+            df_preview = pd.DataFrame(sheet_rows[start_row-1:start_row-1+5])
             st.subheader("Pré-visualização (Topo)")
             st.dataframe(df_preview)
         except Exception as e:
@@ -90,9 +107,9 @@ if uploaded_file is not None:
     if st.button("Executar Pipeline"):
         with st.spinner("Processando..."):
             try:
-                # Reset pointer for processing
-                uploaded_file.seek(0)
-                
+                if sheet_rows is None:
+                    raise ValueError("Não foi possível ler a aba selecionada.")
+
                 # Setup mapping
                 mapping = pipeline.ColumnMapping(
                     item_col=int(item_col),
@@ -105,15 +122,12 @@ if uploaded_file is not None:
                 )
 
 
-                # READ
-                items = pipeline.read_input(uploaded_file, mapping, sheet_name=selected_sheet)
-                
-                # TRANSFORM
-                output_rows = pipeline.transform(items)
+                # READ (reuses the cached parse of the sheet)
+                items = pipeline.read_input_from_rows(sheet_rows[mapping.start_row-1:], mapping)
                 
-                # WRITE TO BUFFER
+                # TRANSFORM + WRITE TO BUFFER (rows stream into the writer)
                 output_buffer = BytesIO()
-                pipeline.write_output(output_rows, output_buffer)
+                pipeline.write_output(pipeline.iter_transform(items), output_buffer)
                 
                 st.success("Processamento concluído com sucesso!")
                 
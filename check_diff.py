@@ -4,36 +4,45 @@ def main():
     print("Comparing planilha_final.xlsx (REF) vs planilha_final_output.xlsx (OUT)...")
     
     try:
-        ref = openpyxl.load_workbook('planilha_final.xlsx', data_only=True)
-        out = openpyxl.load_workbook('planilha_final_output.xlsx', data_only=True)
+        ref = openpyxl.load_workbook('planilha_final.xlsx', data_only=True, read_only=True)
+        out = openpyxl.load_workbook('planilha_final_output.xlsx', data_only=True, read_only=True)
     except FileNotFoundError as e:
         print(f"Error: {e}")
         return
 
-    ws_ref = ref[ref.sheetnames[0]]
-    ws_out = out[out.sheetnames[0]]
+    ref_ws = ref[ref.sheetnames[0]]
+    out_ws = out[out.sheetnames[0]]
+    # Read-only sheets trust the stored <dimension>, which can be stale;
+    # reset it so the whole sheet is compared, not just the recorded range.
+    ref_ws.reset_dimensions()
+    out_ws.reset_dimensions()
+
+    # One sequential scan per sheet, values only (first 6 columns)
+    ref_rows = list(ref_ws.iter_rows(max_col=6, values_only=True))
+    out_rows = list(out_ws.iter_rows(max_col=6, values_only=True))
+    ref.close()
+    out.close()
 
     # Rows in REF that are expected to be missing in OUT (1-based index)
     # Row 2: "CUSTOS DIRETOS DA OBRA" (no item number)
     # Row 256: "CUSTOS INDIRETOS DA OBRA" (no item number)
     SKIP_REF_ROWS = {2, 256}
 
-    print(f"Reference rows: {ws_ref.max_row}")
-    print(f"Output rows:    {ws_out.max_row}")
+    print(f"Reference rows: {len(ref_rows)}")
+    print(f"Output rows:    {len(out_rows)}")
 
     diffs = []
     out_r = 2
-    for ref_r in range(2, ws_ref.max_row + 1):
+    for ref_r, ref_vals in enumerate(ref_rows[1:], start=2):
         if ref_r in SKIP_REF_ROWS:
             print(f"Skipping expected extra row in REF at line {ref_r}")
             continue
         
-        if out_r > ws_out.max_row:
+        if out_r > len(out_rows):
             diffs.append(f"Row {ref_r}: REF has row, OUT is EOF")
             break
 
-        ref_vals = [ws_ref.cell(ref_r, c).value for c in range(1, 7)]
-        out_vals = [ws_out.cell(out_r, c).value for c in range(1, 7)]
+        out_vals = out_rows[out_r - 1]
 
         # Normalize item strings
         ref_item = str(ref_vals[0]).strip() if ref_vals[0] else ''
@@ -0,0 +1,183 @@
+"""
+Minimal streaming XLSX writer.
+
+Writes a single unstyled worksheet straight into the zip container: the
+package parts are fixed templates and the sheet XML is streamed row by row
+with inline strings, so there is no shared-strings table, no style
+evaluation and no in-memory cell grid.
+"""
+
+import math
+import re
+import zipfile
+from collections.abc import Iterable, Sequence
+from xml.sax.saxutils import escape
+
+# ---------------------------------------------------------------------------
+# Static package parts
+# ---------------------------------------------------------------------------
+
+_MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<Relationships xmlns="{_PKG_REL_NS}">'
+    f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<Relationships xmlns="{_PKG_REL_NS}">'
+    f'<Relationship Id="rId1" Type="{_REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+    f'<Relationship Id="rId2" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+# The single default cell format Excel expects to find.
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<styleSheet xmlns="{_MAIN_NS}">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_SHEET_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    f'<worksheet xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheetData>'
+)
+_SHEET_CLOSE = '</sheetData></worksheet>'
+
+
+def _workbook_xml(sheet_name: str) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheets>'
+        f'<sheet name={_quote_attr(sheet_name)} sheetId="1" r:id="rId1"/>'
+        '</sheets></workbook>'
+    )
+
+
+def _quote_attr(value: str) -> str:
+    return '"' + escape(value, {'"': "&quot;"}) + '"'
+
+
+# ---------------------------------------------------------------------------
+# Cell serialisation
+# ---------------------------------------------------------------------------
+
+# Control characters are not allowed in XML 1.0; Excel stores them as _xHHHH_.
+_ILLEGAL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+# Text that already looks like such an escape must itself be escaped (its
+# "_" becomes _x005F_), otherwise readers decode it: "_x0041_" -> "A".
+_LITERAL_ESCAPE = re.compile(r"(_x[0-9a-fA-F]{4}_)")
+
+
+def _column_letter(idx: int) -> str:
+    letters = ""
+    idx += 1
+    while idx:
+        idx, rem = divmod(idx - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _string_cell(ref: str, value: str) -> str:
+    text = escape(value)
+    if "_x" in text:
+        text = _LITERAL_ESCAPE.sub(r"_x005F\1", text)
+    if _ILLEGAL_XML.search(text):
+        text = _ILLEGAL_XML.sub(lambda m: f"_x{ord(m.group()):04X}_", text)
+    if text[:1].isspace() or text[-1:].isspace():
+        return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+    return f'<c r="{ref}" t="inlineStr"><is><t>{text}</t></is></c>'
+
+
+def _cell(ref: str, value) -> str:
+    cls = type(value)
+    if cls is str:
+        return _string_cell(ref, value)
+    if cls is float:
+        if math.isfinite(value):
+            return f'<c r="{ref}"><v>{value!r}</v></c>'
+        return f'<c r="{ref}" t="e"><v>#NUM!</v></c>'
+    if cls is int:
+        return f'<c r="{ref}"><v>{value}</v></c>'
+    if cls is bool:
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+    return _string_cell(ref, str(value))
+
+
+# ---------------------------------------------------------------------------
+# Writer
+# ---------------------------------------------------------------------------
+
+_FLUSH_ROWS = 1000
+
+
+def _encode(xml: str) -> bytes:
+    try:
+        return xml.encode()
+    except UnicodeEncodeError:
+        # Lone surrogates (e.g. from a mis-decoded cell) cannot be stored as
+        # UTF-8; write U+FFFD in their place instead of failing the file.
+        return xml.encode("utf-16", "surrogatepass").decode("utf-16", "replace").encode()
+
+
+def write_rows(rows: Iterable[Sequence], file_obj_or_path, sheet_name: str = "Sheet1") -> int:
+    """Write `rows` as the only worksheet of a new XLSX file.
+
+    `rows` is consumed once; None cells are left empty. Returns the number
+    of rows written.
+    """
+    columns: list[str] = []
+    count = 0
+
+    with zipfile.ZipFile(file_obj_or_path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        zf.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        zf.writestr("_rels/.rels", _ROOT_RELS)
+        zf.writestr("xl/workbook.xml", _workbook_xml(sheet_name))
+        zf.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        zf.writestr("xl/styles.xml", _STYLES)
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as out:
+            out.write(_SHEET_OPEN.encode())
+            buf: list[str] = []
+            for count, row in enumerate(rows, start=1):
+                while len(columns) < len(row):
+                    columns.append(_column_letter(len(columns)))
+                r = str(count)
+                buf.append(f'<row r="{r}">')
+                for col, value in zip(columns, row):
+                    if value is not None:
+                        buf.append(_cell(col + r, value))
+                buf.append("</row>")
+                if count % _FLUSH_ROWS == 0:
+                    out.write(_encode("".join(buf)))
+                    buf.clear()
+            buf.append(_SHEET_CLOSE)
+            out.write(_encode("".join(buf)))
+
+    return count
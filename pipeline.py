@@ -5,19 +5,51 @@ Normalizes item hierarchy to always have 4 levels (XXX.XXX.XXX.XXX).
 Data items must be at level 4; missing intermediate levels are auto-created.
 """
 
+import csv
+import os
 import sys
 import re
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
+from datetime import date, datetime
+from functools import lru_cache
+from itertools import islice
+from operator import itemgetter
 from pathlib import Path
+from typing import NamedTuple
 
 import openpyxl
 
+import fast_xlsx
+
+try:
+    from python_calamine import load_workbook as calamine_load_workbook
+except ImportError:  # optional: fall back to openpyxl's reader
+    calamine_load_workbook = None
+
+try:
+    import xlsxwriter
+except ImportError:  # optional: fall back to openpyxl's writer
+    xlsxwriter = None
+
 
 # ---------------------------------------------------------------------------
 # Data model
 # ---------------------------------------------------------------------------
 
-@dataclass
+# 0-999 -> "000".."999", for the L4 sequence numbers built in transform.
+_PAD3_BY_INT = [f"{i:03d}" for i in range(1000)]
+
+# Item segment -> 3-digit padded form, for the 0-999 range sheets actually
+# use. Covers "1", "01" and "001" spellings; anything else falls back to zfill.
+_PAD3 = {
+    key: padded
+    for i, padded in enumerate(_PAD3_BY_INT)
+    for key in (str(i), f"{i:02d}", padded)
+}
+
+@dataclass(slots=True)
 class InputItem:
     """A parsed row from the input spreadsheet."""
     raw_item: str          # e.g. "01.02.01" or "4"
@@ -28,26 +60,28 @@ class InputItem:
     quantity: float | None # QUANTIDADE (col S)
     is_data: bool = False  # True when item has code + unit (leaf item)
 
-    @property
-    def parts(self) -> list[str]:
-        """Split item into its dotted parts, zero-padded to 3 digits."""
+    # Derived from raw_item once in __post_init__; transform reads them
+    # several times per item.
+    parts: tuple[str, ...] = field(init=False, repr=False)  # dotted parts, 3-digit padded
+    level: int = field(init=False, repr=False)
+    padded_item: str = field(init=False, repr=False)  # e.g. "001.002.001"
+
+    def __post_init__(self):
         raw = str(self.raw_item)
         # Level-1 items may be plain integers (e.g. 1, 2, 3)
         segments = raw.split(".")
-        return [seg.zfill(3) for seg in segments]
+        # A tuple so transform can use it (and its slices) as a dict key
+        self.parts = tuple([_PAD3.get(seg) or seg.zfill(3) for seg in segments])
+        self.level = len(self.parts)
+        self.padded_item = ".".join(self.parts)
 
-    @property
-    def level(self) -> int:
-        return len(self.parts)
-
-    @property
-    def padded_item(self) -> str:
-        return ".".join(self.parts)
 
+class OutputRow(NamedTuple):
+    """A row to write in the output spreadsheet.
 
-@dataclass
-class OutputRow:
-    """A row to write in the output spreadsheet."""
+    Fields follow HEADER_ROW's column order, so a row can be handed to the
+    writers as-is.
+    """
     item: str               # e.g. "001.002.001.001"
     code: str | None = None
     description: str = ""
@@ -75,9 +109,18 @@ UNIT_MAP = {
 def normalise_unit(raw: str | None) -> str | None:
     if raw is None:
         return None
-    raw = str(raw)
-    key = raw.strip().upper()
-    return UNIT_MAP.get(key, raw.strip().lower())
+    return _normalise_unit_str(str(raw))
+
+
+# Units are a small set repeated on every data row, so results are cached.
+# The key is the already-coerced string, so 1 and 1.0 stay apart ("1" vs
+# "1.0") without a typed cache.
+@lru_cache(maxsize=512)
+def _normalise_unit_str(value: str, _get=UNIT_MAP.get) -> str:
+    # _get is bound at definition time so the lookup is a local,
+    # not a global + attribute load.
+    value = value.strip()
+    return _get(value.upper(), value.lower())
 
 
 
@@ -86,7 +129,7 @@ def normalise_unit(raw: str | None) -> str | None:
 # ---------------------------------------------------------------------------
 
 
-@dataclass
+@dataclass(slots=True)
 class ColumnMapping:
     # Default indices (0-based): A=0, B=1, ...
     item_col: int = 1   # Col B
@@ -97,91 +140,196 @@ class ColumnMapping:
     qty_col: int = 18   # Col S
     start_row: int = 7
 
+    @property
+    def last_col(self) -> int:
+        """Highest mapped column index (0-based)."""
+        return max(self.item_col, self.desc_col, self.code_col,
+                   self.unit_col, self.price_col, self.qty_col)
+
+def _calamine_value(value):
+    """Map a calamine cell value onto what openpyxl would have returned."""
+    if value == "":
+        return None
+    # calamine reports every number as float; whole numbers (item "1",
+    # code 101) must keep their integer text form.
+    if type(value) is float and value.is_integer():
+        return int(value)
+    # calamine gives midnight date cells as date; openpyxl as datetime
+    if type(value) is date:
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+def _iter_calamine_rows(file_obj, sheet_name: str | None, start_row: int, max_col: int | None):
+    # calamine reads from the current position, openpyxl from the start;
+    # rewind so a buffer that was just written can be read the same way.
+    if hasattr(file_obj, "seek"):
+        file_obj.seek(0)
+    wb = calamine_load_workbook(file_obj)
+    try:
+        if sheet_name:
+            if sheet_name not in wb.sheet_names:
+                raise ValueError(f"Sheet '{sheet_name}' not found in workbook.")
+            sheet = wb.get_sheet_by_name(sheet_name)
+        else:
+            sheet = wb.get_sheet_by_index(0)
+
+        if sheet.start is None:  # empty sheet
+            return
+
+        # iter_rows converts one row at a time (to_python would box the whole
+        # sheet into Python lists up front). Rows begin at row 1, but columns
+        # begin at the first used column, so pad the left edge back to col A.
+        pad = [None] * sheet.start[1]
+        stop = None if max_col is None else max(max_col - len(pad), 0)
+        for row in islice(sheet.iter_rows(), start_row - 1, None):
+            cells = pad + [_calamine_value(v) for v in row[:stop]]
+            # Rows end at the sheet's last used column; pad the right edge out
+            # to max_col as openpyxl does, so an empty mapped column still reads.
+            if max_col is not None and len(cells) < max_col:
+                cells += [None] * (max_col - len(cells))
+            yield cells
+    finally:
+        wb.close()
+
+
+def _iter_openpyxl_rows(file_obj, sheet_name: str | None, start_row: int, max_col: int | None):
+    wb = openpyxl.load_workbook(file_obj, data_only=True, read_only=True)
+    try:
+        if sheet_name:
+            if sheet_name not in wb.sheetnames:
+                raise ValueError(f"Sheet '{sheet_name}' not found in workbook.")
+            ws = wb[sheet_name]
+        else:
+            ws = wb[wb.sheetnames[0]]
+
+        # Read-only sheets take their bounds from the <dimension> record, which
+        # some writers leave stale (e.g. "A1"); reset it so rows are read until
+        # the sheet data actually ends instead of being silently truncated.
+        ws.reset_dimensions()
+        yield from ws.iter_rows(min_row=start_row, max_col=max_col, values_only=True)
+    finally:
+        wb.close()
+
+
+def iter_sheet_rows(file_obj, sheet_name: str | None = None, start_row: int = 1, max_col: int | None = None):
+    """Yield the cell values of each sheet row, starting at `start_row`.
+
+    Rows always begin at column A. When `max_col` (1-based) is given, every
+    row is exactly `max_col` cells wide: later columns are dropped unconverted
+    and missing trailing cells are padded with None. Without it, row widths
+    follow the sheet and may differ between readers and between rows.
+    Uses python-calamine (Rust parser) when installed, otherwise openpyxl in
+    read-only mode with the sheet's recorded dimensions reset, so a stale
+    <dimension> cannot cut the read short. Empty cells are None in both cases.
+    """
+    if calamine_load_workbook is not None:
+        return _iter_calamine_rows(file_obj, sheet_name, start_row, max_col)
+    return _iter_openpyxl_rows(file_obj, sheet_name, start_row, max_col)
+
+
 def read_input(file_obj, mapping: ColumnMapping = ColumnMapping(), sheet_name: str | None = None) -> list[InputItem]:
     """Read the input spreadsheet and return a list of InputItems."""
-    wb = openpyxl.load_workbook(file_obj, data_only=True)
-    
-    if sheet_name:
-        if sheet_name not in wb.sheetnames:
-            raise ValueError(f"Sheet '{sheet_name}' not found in workbook.")
-        ws = wb[sheet_name]
-    else:
-        ws = wb[wb.sheetnames[0]]
+    rows = iter_sheet_rows(file_obj, sheet_name, mapping.start_row, max_col=mapping.last_col + 1)
+    return read_input_from_rows(rows, mapping)
 
-    # Indices are now directly provided in mapping (0-based)
-    item_idx = mapping.item_col
-    desc_idx = mapping.desc_col
-    code_idx = mapping.code_col
-    unit_idx = mapping.unit_col
-    price_idx = mapping.price_col
-    qty_idx = mapping.qty_col
 
-    items: list[InputItem] = []
-    
-    # We iterate over all rows, but start at mapping.start_row
-    for row in ws.iter_rows(min_row=mapping.start_row, max_row=ws.max_row, values_only=False):
-        # row is a tuple of Cell objects
-        # We need to ensure the row has enough columns for our indices
-        max_idx = max(item_idx, desc_idx, code_idx, unit_idx, price_idx, qty_idx)
-        if len(row) <= max_idx:
-            continue
+def _clean_text(value) -> str | None:
+    """Return a cell value as stripped text, or None when it is empty."""
+    if value is None:
+        return None
+    text = (value if type(value) is str else str(value)).strip()
+    return text or None
 
-        item_cell = row[item_idx]
-        desc_cell = row[desc_idx]
-        code_cell = row[code_idx]
-        unit_cell = row[unit_idx]
-        price_cell = row[price_idx]
-        qty_cell = row[qty_idx]
 
-        item_val = item_cell.value
-        if item_val is None:
-            continue
+def _to_float(value) -> float | None:
+    """Return a non-empty, non-zero numeric cell as float, else None.
+
+    Excel numbers arrive as int/float and are converted directly; only text
+    cells go through parsing (accepting a decimal comma).
+    """
+    if not value:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.replace(",", "."))
+        except ValueError:
+            return None
+    return None
 
-        item_str = str(item_val).strip()
-        if not item_str:
+
+def read_input_from_rows(rows: Iterable[Sequence], mapping: ColumnMapping = ColumnMapping()) -> list[InputItem]:
+    """Build InputItems from already-read sheet rows.
+
+    `rows` must begin at `mapping.start_row` (e.g. output of iter_sheet_rows,
+    or a cached list of rows sliced accordingly).
+    """
+    return list(iter_input_items(rows, mapping))
+
+
+def iter_input_items(rows: Iterable[Sequence], mapping: ColumnMapping = ColumnMapping()) -> Iterator[InputItem]:
+    """Lazily parse sheet rows (see read_input_from_rows) into InputItems."""
+    # Indices are directly provided in mapping (0-based); itemgetter pulls
+    # all six cells of a row in one C call.
+    get_cells = itemgetter(
+        mapping.item_col,
+        mapping.desc_col,
+        mapping.code_col,
+        mapping.unit_col,
+        mapping.price_col,
+        mapping.qty_col,
+    )
+    max_idx = mapping.last_col
+
+    for row in rows:
+        # Rows may stop at their last present cell (e.g. group rows with only
+        # ITEM and DESCRIÇÃO filled); missing trailing cells are empty, not a
+        # reason to drop the row.
+        if len(row) <= max_idx:
+            row = [*row, *[None] * (max_idx + 1 - len(row))]
+
+        item_val, desc_val, code_val, unit_val, price, qty = get_cells(row)
+
+        item_str = _clean_text(item_val)
+        if item_str is None:
             continue
 
-        desc = str(desc_cell.value or "").strip()
-        code = str(code_cell.value).strip() if code_cell.value is not None else None
-        unit = str(unit_cell.value).strip() if unit_cell.value is not None else None
-        price = price_cell.value
-        qty = qty_cell.value
+        # Descriptions, codes and units repeat across rows; interning makes
+        # equal texts share one string object instead of one per cell.
+        desc = sys.intern(str(desc_val or "").strip())
+        code = _clean_text(code_val)
+        unit = _clean_text(unit_val)
 
         # Determine if this is a data item (has code AND non-empty unit)
-        has_code = code is not None and code != ""
-        has_unit = unit is not None and unit != ""
-        is_data = has_code and has_unit
+        is_data = code is not None and unit is not None
             
         # Clean price and qty
-        try:
-             price_val = float(price) if is_data and price else None
-        except (ValueError, TypeError):
-             price_val = None
-             
-        try:
-             qty_val = round(float(qty), 2) if is_data and qty else None
-        except (ValueError, TypeError):
-             qty_val = None
+        if is_data:
+            price_val = _to_float(price)
+            qty_val = _to_float(qty)
+            if qty_val is not None:
+                qty_val = round(qty_val, 2)
+        else:
+            price_val = qty_val = None
 
-        items.append(InputItem(
+        yield InputItem(
             raw_item=item_str,
             description=desc,
-            code=code if is_data else None,
-            unit=unit if is_data else None,
+            code=sys.intern(code) if is_data else None,
+            unit=sys.intern(unit) if is_data else None,
             price=price_val,
             quantity=qty_val,
             is_data=is_data,
-        ))
-
-    wb.close()
-    return items
+        )
 
 
 # ---------------------------------------------------------------------------
 # Transform
 # ---------------------------------------------------------------------------
 
-def transform(items: list[InputItem]) -> list[OutputRow]:
+def iter_transform(items: Iterable[InputItem]) -> Iterator[OutputRow]:
     """
     Transform items so every data item is at level 4.
     
@@ -193,25 +341,26 @@ def transform(items: list[InputItem]) -> list[OutputRow]:
         - L3 Task (Parent L2): -> Syn L3 (Parent Desc) -> L4 Task
         - L4 Task: Keep
         - L5+ Task: Flatten to L4 (merge suffix)
+
+    Works in a single pass: a parent description comes from the group row
+    seen before the task, as group rows always precede their tasks in the
+    sheet. `items` may therefore be a lazy iterator (e.g. iter_input_items),
+    and rows are yielded in output order, so they can be streamed straight
+    into write_output without materialising the input or the result.
     """
-    output: list[OutputRow] = []
 
-    # Map to store descriptions of potential parents (Groups)
-    desc_map: dict[str, str] = {}
-    
-    # Track emitted synthetic headers
-    emitted_headers: set[str] = set()
+    # Track emitted headers, keyed like desc_map by the tuple of padded parts
+    emitted_headers: set[tuple[str, ...]] = set()
     
     # Counter for sequential numbering at Level 4
     # Key = L3 Parent Item (e.g. "001.001.001"), Value = Next Index
     l3_counters: dict[str, int] = {}
 
-    # Pass 1: Collect descriptions from Groups
-    for item in items:
-        if not item.is_data:
-            desc_map[item.padded_item] = item.description
+    # Descriptions of potential parents (Groups), filled as groups are seen.
+    # Keys are tuples of padded parts so parent lookups slice `parts`
+    # instead of re-joining dotted strings.
+    desc_map: dict[tuple[str, ...], str] = {}
 
-    # Pass 2: Generate output
     for item in items:
         padded = item.padded_item
         parts = item.parts
@@ -219,11 +368,9 @@ def transform(items: list[InputItem]) -> list[OutputRow]:
         
         if not item.is_data:
             # GROUPS: Output as is
-            output.append(OutputRow(
-                item=padded, 
-                description=item.description
-            ))
-            emitted_headers.add(padded)
+            desc_map[parts] = item.description
+            yield OutputRow(item=padded, description=item.description)
+            emitted_headers.add(parts)
         
         else:
             # TASKS
@@ -234,39 +381,38 @@ def transform(items: list[InputItem]) -> list[OutputRow]:
             if level == 2:
                 # Parent is L1 (first part)
                 parent_l1 = parts[0]
-                parent_desc = desc_map.get(parent_l1, "")
+                parent_desc = desc_map.get((parent_l1,), "")
                 
                 # Synthetic L2: 001.001
-                syn_l2 = f"{parent_l1}.001"
+                syn_l2 = (parent_l1, "001")
                 if syn_l2 not in emitted_headers:
-                    output.append(OutputRow(item=syn_l2, description=parent_desc))
+                    yield OutputRow(item=f"{parent_l1}.001", description=parent_desc)
                     emitted_headers.add(syn_l2)
                     
                 # Synthetic L3: 001.001.001
-                syn_l3 = f"{syn_l2}.001"
+                syn_l3 = (parent_l1, "001", "001")
+                l3_container = f"{parent_l1}.001.001"
                 if syn_l3 not in emitted_headers:
                     # Note: L3 syn header also takes L1 parent desc in this case
-                    output.append(OutputRow(item=syn_l3, description=parent_desc))
+                    yield OutputRow(item=l3_container, description=parent_desc)
                     emitted_headers.add(syn_l3)
-                    
-                l3_container = syn_l3
 
             elif level == 3:
                 # Parent is L2 (first 2 parts)
-                parent_l2 = ".".join(parts[:2])
+                parent_l2 = parts[:2]
                 parent_desc = desc_map.get(parent_l2, "")
                 
                 # Synthetic L3: 001.002.001 (e.g.)
-                syn_l3 = f"{parent_l2}.001"
+                syn_l3 = (*parent_l2, "001")
+                l3_container = f"{parts[0]}.{parts[1]}.001"
                 if syn_l3 not in emitted_headers:
-                    output.append(OutputRow(item=syn_l3, description=parent_desc))
+                    yield OutputRow(item=l3_container, description=parent_desc)
                     emitted_headers.add(syn_l3)
-                    
-                l3_container = syn_l3
                 
             elif level == 4:
-                # Parent is L3 (first 3 parts)
-                l3_container = ".".join(parts[:3])
+                # Parent is L3 (first 3 parts): already joined inside padded,
+                # so slice it off instead of joining parts[:3] again
+                l3_container = padded[:-len(parts[3]) - 1]
                 # Ensure L3 container header exists? 
                 # Usually yes if it was in the input as a Group, but if this L4 task
                 # appeared alone, we might need to synthetically create the L3 header?
@@ -274,22 +420,20 @@ def transform(items: list[InputItem]) -> list[OutputRow]:
                 
             elif level >= 5:
                 # Deep items (Flatten)
-                # Parent is L3
-                base_l3 = ".".join(parts[:3])
-                
-                # Merge suffix
-                # 12.04.01.02.01 -> rest = 0201
-                rest = "".join(parts[3:])
-                l4_item = f"{base_l3}.{rest}"
+                # Parent is L3: keep the padded string up to its third dot and
+                # merge the suffix by dropping the remaining dots
+                # 12.04.01.02.01 -> 012.004.001.002001
+                third_dot = padded.find(".", padded.find(".", padded.find(".") + 1) + 1)
+                l4_item = padded[:third_dot + 1] + padded[third_dot + 1:].replace(".", "")
                 
-                output.append(OutputRow(
+                yield OutputRow(
                     item=l4_item,
                     code=item.code,
                     description=item.description,
                     unit=normalise_unit(item.unit),
                     quantity=item.quantity,
                     price=item.price,
-                ))
+                )
                 continue # Skip sequential renumbering for flattened items (keep specific ID)
 
             # Generate L4 Item (Renumbering for L2-L4 items)
@@ -297,18 +441,22 @@ def transform(items: list[InputItem]) -> list[OutputRow]:
                 idx = l3_counters.get(l3_container, 1)
                 l3_counters[l3_container] = idx + 1
                 
-                l4_item = f"{l3_container}.{idx:03d}"
+                suffix = _PAD3_BY_INT[idx] if idx < 1000 else str(idx)
+                l4_item = f"{l3_container}.{suffix}"
                 
-                output.append(OutputRow(
+                yield OutputRow(
                     item=l4_item,
                     code=item.code,
                     description=item.description,
                     unit=normalise_unit(item.unit),
                     quantity=item.quantity,
                     price=item.price,
-                ))
+                )
 
-    return output
+
+def transform(items: Iterable[InputItem]) -> list[OutputRow]:
+    """Transform items so every data item is at level 4 (see iter_transform)."""
+    return list(iter_transform(items))
 
 
 # ---------------------------------------------------------------------------
@@ -325,58 +473,158 @@ HEADER_ROW = [
 ]
 
 
-def write_output(rows: list[OutputRow], file_obj_or_path) -> None:
-    """Write the output spreadsheet to a file object or path."""
-    wb = openpyxl.Workbook()
-    ws = wb.active
-    ws.title = "Planilha"
+def _write_xlsxwriter(rows: Iterable[OutputRow], file_obj_or_path) -> int:
+    # constant_memory streams each row to a temp file instead of keeping the
+    # whole sheet in memory; rows must therefore be written in order.
+    wb = xlsxwriter.Workbook(file_obj_or_path, {
+        "constant_memory": True,
+        "strings_to_urls": False,    # keep descriptions as plain text
+        "nan_inf_to_errors": True,
+    })
+    ws = wb.add_worksheet("Planilha")
+
+    # Header
+    ws.write_row(0, 0, HEADER_ROW)
+
+    r_idx = 0
+    # OutputRow fields are already in column order
+    for r_idx, row in enumerate(rows, start=1):
+        ws.write_row(r_idx, 0, row)
+
+    wb.close()
+    return r_idx
+
+
+def _write_openpyxl(rows: Iterable[OutputRow], file_obj_or_path) -> int:
+    # write_only serialises appended rows instead of building a cell grid
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("Planilha")
 
     # Header
     ws.append(HEADER_ROW)
 
+    count = 0
+    # OutputRow fields are already in column order
     for row in rows:
-        ws.append([
-            row.item,
-            row.code,
-            row.description,
-            row.unit,
-            row.quantity,
-            row.price,
-        ])
+        count += 1
+        ws.append(row)
 
     wb.save(file_obj_or_path)
     wb.close()
+    return count
+
+
+def write_output(rows: Iterable[OutputRow], file_obj_or_path, engine: str = "xlsxwriter") -> int:
+    """Write the output spreadsheet to a file object or path.
+
+    `rows` is consumed once, so it may be a generator (e.g. iter_transform).
+    engine="xlsxwriter" (default) uses xlsxwriter in constant-memory mode
+    when installed, otherwise openpyxl; engine="openpyxl" forces openpyxl.
+    engine="fast" is opt-in: it streams the sheet XML directly (see
+    fast_xlsx) and has not yet been checked against the Sienge importer.
+    Returns the number of rows written, excluding the header.
+    """
+    if engine == "fast":
+        return fast_xlsx.write_rows(_with_header(rows), file_obj_or_path, "Planilha") - 1
+    if engine == "xlsxwriter" and xlsxwriter is not None:
+        return _write_xlsxwriter(rows, file_obj_or_path)
+    if engine in ("xlsxwriter", "openpyxl"):
+        return _write_openpyxl(rows, file_obj_or_path)
+    raise ValueError(f"Unknown output engine: {engine!r}")
+
+
+def _with_header(rows: Iterable[OutputRow]) -> Iterator[Sequence]:
+    yield HEADER_ROW
+    yield from rows
+
+
+def write_output_csv(rows: Iterable[OutputRow], path) -> int:
+    """Write the output rows as CSV, for consumers that only need values.
+
+    Skips the XLSX XML/zip serialisation entirely. Returns the number of rows
+    written, excluding the header.
+    """
+    count = 0
+
+    def counted(rows: Iterable[OutputRow]) -> Iterator[OutputRow]:
+        nonlocal count
+        for row in rows:
+            count += 1
+            yield row
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(HEADER_ROW)
+        writer.writerows(counted(rows))
+    return count
 
 
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
 
-def main():
-    if len(sys.argv) < 3:
-        print("Usage: python pipeline.py <input.xlsx> <output.xlsx>")
-        sys.exit(1)
+def convert_file(input_path, output_path, mapping: ColumnMapping = ColumnMapping(),
+                 engine: str = "xlsxwriter") -> tuple[int, int, int]:
+    """Stream one workbook through read → transform → write.
+
+    Rows flow from the reader through transform into the writer one at a
+    time; neither the parsed items nor the output rows are held in memory.
+    Output paths ending in .csv are written as CSV, anything else as XLSX
+    with the given write_output engine.
+    Returns (data items, header items, output rows).
+    """
+    counts = {True: 0, False: 0}
+
+    def counted(items: Iterable[InputItem]) -> Iterator[InputItem]:
+        for item in items:
+            counts[item.is_data] += 1
+            yield item
+
+    rows = iter_sheet_rows(input_path, None, mapping.start_row, max_col=mapping.last_col + 1)
+    items = counted(iter_input_items(rows, mapping))
+    if str(output_path).lower().endswith(".csv"):
+        n_rows = write_output_csv(iter_transform(items), output_path)
+    else:
+        n_rows = write_output(iter_transform(items), output_path, engine=engine)
+    return counts[True], counts[False], n_rows
 
-    input_path = sys.argv[1]
-    output_path = sys.argv[2]
 
-    print(f"Reading: {input_path}")
-    items = read_input(input_path)
-    print(f"  {len(items)} items parsed")
+def main():
+    args = sys.argv[1:]
+    # --fast-xlsx opts into the streaming fast_xlsx writer. Its output has
+    # not yet been checked against the Sienge importer, so it is not the
+    # default.
+    engine = "xlsxwriter"
+    if "--fast-xlsx" in args:
+        args.remove("--fast-xlsx")
+        engine = "fast"
+
+    if len(args) < 2 or len(args) % 2:
+        print("Usage: python pipeline.py [--fast-xlsx] <input.xlsx> <output.xlsx|.csv> [<input.xlsx> <output.xlsx|.csv> ...]")
+        sys.exit(1)
 
-    data_items = [it for it in items if it.is_data]
-    header_items = [it for it in items if not it.is_data]
-    print(f"  {len(data_items)} data items, {len(header_items)} headers")
+    input_paths = args[0::2]
+    output_paths = args[1::2]
 
-    print("Transforming...")
-    output_rows = transform(items)
-    print(f"  {len(output_rows)} output rows")
+    print(f"Processing: {', '.join(input_paths)}")
+    if len(input_paths) == 1:
+        results = [convert_file(input_paths[0], output_paths[0], engine=engine)]
+    else:
+        # Whole files are independent, so convert them in parallel; processes
+        # because transform and the writers are pure Python and hold the GIL.
+        workers = min(len(input_paths), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                convert_file, input_paths, output_paths,
+                [ColumnMapping()] * len(input_paths), [engine] * len(input_paths),
+            ))
 
-    data_output = [r for r in output_rows if r.code is not None]
-    print(f"  {len(data_output)} data rows in output")
+    for input_path, output_path, (n_data, n_headers, n_rows) in zip(input_paths, output_paths, results):
+        print(f"{input_path} -> {output_path}:")
+        print(f"  {n_data + n_headers} items parsed")
+        print(f"  {n_data} data items, {n_headers} headers")
+        print(f"  {n_rows} output rows")
 
-    print(f"Writing: {output_path}")
-    write_output(output_rows, output_path)
     print("Done!")
 
 
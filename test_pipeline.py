@@ -9,15 +9,24 @@ Covers:
   - Full round-trip: read → transform → write → re-read
 """
 
+import csv
+import re
+import sys
+import zipfile
 import pytest
 import openpyxl
+from datetime import datetime
 from io import BytesIO
+import pipeline
 from pipeline import (
     InputItem,
+    convert_file,
     OutputRow,
     ColumnMapping,
     normalise_unit,
     read_input,
+    read_input_from_rows,
+    iter_transform,
     transform,
     write_output,
 )
@@ -37,7 +46,8 @@ def _make_workbook(rows, start_row=1):
     ws = wb.active
     for r_idx, row in enumerate(rows, start=start_row):
         for c_idx, val in enumerate(row, start=1):
-            ws.cell(row=r_idx, column=c_idx, value=val)
+            if val is not None:  # absent cells already read back as None
+                ws.cell(row=r_idx, column=c_idx, value=val)
     buf = BytesIO()
     wb.save(buf)
     wb.close()
@@ -92,6 +102,11 @@ class TestNormaliseUnit:
         assert isinstance(result, str)
         assert result == "1"
 
+    def test_cache_keeps_int_and_float_apart(self):
+        """1 and 1.0 hash equal but must not share a cached result."""
+        assert normalise_unit(1) == "1"
+        assert normalise_unit(1.0) == "1.0"
+
     def test_float_input_does_not_crash(self):
         result = normalise_unit(2.5)
         assert isinstance(result, str)
@@ -104,13 +119,13 @@ class TestNormaliseUnit:
 class TestInputItem:
     def test_single_part(self):
         item = InputItem(raw_item="1", description="Obras", code=None, unit=None, price=None, quantity=None)
-        assert item.parts == ["001"]
+        assert item.parts == ("001",)
         assert item.level == 1
         assert item.padded_item == "001"
 
     def test_two_parts(self):
         item = InputItem(raw_item="2.03", description="Sub", code=None, unit=None, price=None, quantity=None)
-        assert item.parts == ["002", "003"]
+        assert item.parts == ("002", "003")
         assert item.level == 2
 
     def test_four_parts_padded(self):
@@ -176,6 +191,19 @@ class TestReadInput:
         assert isinstance(task.code, str)
         assert isinstance(task.unit, str)
 
+    def test_price_and_qty_from_text_cells(self):
+        """Numeric text (incl. decimal comma) is parsed; other text becomes None."""
+        buf = _make_workbook([
+            ["1.1.1.1", "Task A", "C1", "M2", "12,5", "3.456"],
+            ["1.1.1.2", "Task B", "C2", "M2", "n/a",  "-"],
+        ])
+        items = read_input(buf, _default_mapping())
+
+        assert items[0].price == 12.5
+        assert items[0].quantity == 3.46
+        assert items[1].price is None
+        assert items[1].quantity is None
+
     def test_empty_code_is_not_data(self):
         """Rows with empty code should not be marked as data items."""
         # Note: trailing None cells may be omitted by openpyxl, so we put 0
@@ -228,6 +256,150 @@ class TestReadInput:
         assert len(items) == 1
         assert items[0].description == "Right Sheet"
 
+    def test_read_input_from_rows(self):
+        """Already-read rows (e.g. cached by the app) parse like a workbook."""
+        rows = [
+            ["1",   "Header", None,    None, None, None],
+            ["1.1", "Task A", "ABC01", "M2", 10.0, 5.0],
+        ]
+        mapping = _default_mapping()
+        assert read_input_from_rows(rows, mapping) == read_input(_make_workbook(rows), mapping)
+
+    @pytest.mark.parametrize("calamine", [True, False])
+    def test_ragged_sheet_rows_keep_headers(self, monkeypatch, calamine):
+        """The app path (rows read without max_col) keeps short group rows."""
+        if not calamine:
+            monkeypatch.setattr(pipeline, "calamine_load_workbook", None)
+        buf = _make_workbook([
+            ["1",       "Obras"],
+            ["1.1.1.1", "Task", "A1", "M2", 10.0, 5.0],
+        ])
+        rows = list(pipeline.iter_sheet_rows(buf))
+
+        items = read_input_from_rows(rows, _default_mapping(qty_col=6))
+
+        assert [it.raw_item for it in items] == ["1", "1.1.1.1"]
+        assert items[0].description == "Obras"
+
+    def test_openpyxl_fallback_matches(self, monkeypatch):
+        """Without python-calamine, the openpyxl reader yields the same items."""
+        rows = [
+            ["1",       "Obras",  None,  None, None, None],
+            [1.1,       "Sub",    None,  None, None, None],
+            ["1.1.1.1", "Task",   101,   2,    50.0, 10.0],
+            ["1.1.1.2", "Task B", "XY",  "M2", 30.0, 5.0],
+        ]
+        mapping = _default_mapping()
+        default_items = read_input(_make_workbook(rows), mapping)
+
+        monkeypatch.setattr(pipeline, "calamine_load_workbook", None)
+        fallback_items = read_input(_make_workbook(rows), mapping)
+
+        assert fallback_items == default_items
+
+    @pytest.mark.parametrize("calamine", [True, False])
+    def test_empty_last_mapped_column(self, monkeypatch, calamine):
+        """A styled but empty QTY column must not make the reader drop rows."""
+        wb = openpyxl.Workbook()
+        ws = wb.active
+        for r_idx, row in enumerate([
+            ["1",       "Obras", None, None, None,  None],
+            ["1.1.1.1", "Task",  "A1", "M2", 10.0, 5.0],
+        ], start=1):
+            for c_idx, val in enumerate(row, start=1):
+                if val is not None:
+                    ws.cell(row=r_idx, column=c_idx, value=val)
+            ws.cell(row=r_idx, column=7).font = openpyxl.styles.Font(bold=True)
+        buf = BytesIO()
+        wb.save(buf)
+        wb.close()
+        buf.seek(0)
+
+        if not calamine:
+            monkeypatch.setattr(pipeline, "calamine_load_workbook", None)
+        items = read_input(buf, _default_mapping(qty_col=6))
+
+        assert [it.raw_item for it in items] == ["1", "1.1.1.1"]
+        assert items[1].quantity is None
+
+    @pytest.mark.parametrize("calamine", [True, False])
+    def test_all_empty_qty_column_from_make_workbook(self, monkeypatch, calamine):
+        """_make_workbook skips None cells, so an all-None QTY column leaves the
+        sheet narrower than the mapping; every row must still be read."""
+        if not calamine:
+            monkeypatch.setattr(pipeline, "calamine_load_workbook", None)
+        buf = _make_workbook([
+            ["1",       "Obras",  None, None,  None, None],
+            ["1.1.1.1", "Task",   "A1", "M2",  10.0, None],
+            ["1.1.1.2", "Task B", "B2", "UND", 5.0,  None],
+        ])
+
+        items = read_input(buf, _default_mapping())
+
+        assert [it.raw_item for it in items] == ["1", "1.1.1.1", "1.1.1.2"]
+        assert [it.quantity for it in items] == [None, None, None]
+
+    @pytest.mark.parametrize("calamine", [True, False])
+    def test_sheet_rows_are_max_col_wide(self, monkeypatch, calamine):
+        if not calamine:
+            monkeypatch.setattr(pipeline, "calamine_load_workbook", None)
+        buf = _make_workbook([
+            ["1",       "Obras"],
+            ["1.1.1.1", "Task", "A1", "M2", 10.0, 5.0, "extra"],
+        ])
+
+        rows = list(pipeline.iter_sheet_rows(buf, max_col=6))
+
+        assert [len(r) for r in rows] == [6, 6]
+        assert list(rows[0]) == ["1", "Obras", None, None, None, None]
+
+    def test_read_input_rewinds_buffer(self):
+        """A buffer left at its end after writing is read from the start."""
+        wb = openpyxl.Workbook()
+        wb.active.append(["1", "Obras", None, None, None, 0])
+        buf = BytesIO()
+        wb.save(buf)  # position is now at the end
+        wb.close()
+
+        items = read_input(buf, _default_mapping())
+
+        assert [it.raw_item for it in items] == ["1"]
+
+    def test_date_cells_match_between_readers(self, monkeypatch):
+        """Midnight dates come back as datetime from both readers."""
+        rows = [["1", datetime(2024, 1, 2), datetime(2024, 1, 2, 13, 30)]]
+        default_rows = list(pipeline.iter_sheet_rows(_make_workbook(rows)))
+
+        monkeypatch.setattr(pipeline, "calamine_load_workbook", None)
+        fallback_rows = list(pipeline.iter_sheet_rows(_make_workbook(rows)))
+
+        assert [list(r) for r in default_rows] == [list(r) for r in fallback_rows]
+        assert type(default_rows[0][1]) is datetime
+
+    def test_openpyxl_reads_past_stale_dimension(self, monkeypatch):
+        """A wrong <dimension ref> must not truncate the openpyxl read."""
+        rows = [
+            ["1",       "Obras",  None,  None,  None, None],
+            ["1.1",     "Sub",    None,  None,  None, None],
+            ["1.1.1",   "Grupo",  None,  None,  None, None],
+            ["1.1.1.1", "Task",   "A1",  "M2",  1.0,  2.0],
+            ["1.1.1.2", "Task B", "B2",  "UND", 3.0,  4.0],
+        ]
+        src = _make_workbook(rows)
+        stale = BytesIO()
+        with zipfile.ZipFile(src) as zin, zipfile.ZipFile(stale, "w") as zout:
+            for info in zin.infolist():
+                data = zin.read(info.filename)
+                if info.filename == "xl/worksheets/sheet1.xml":
+                    data = re.sub(rb'<dimension ref="[^"]*"', b'<dimension ref="A1"', data)
+                zout.writestr(info, data)
+        stale.seek(0)
+
+        monkeypatch.setattr(pipeline, "calamine_load_workbook", None)
+        items = read_input(stale, _default_mapping())
+
+        assert [it.raw_item for it in items] == [r[0] for r in rows]
+
 
 # ═══════════════════════════════════════════════════════════════════════════
 # transform
@@ -302,6 +474,16 @@ class TestTransform:
         parts = data_rows[0].item.split(".")
         assert len(parts) == 4  # still 4 levels
 
+    def test_deep_task_suffix_merged(self):
+        """Segments past level 3 are concatenated into the level-4 segment."""
+        items = self._make_items([
+            ("12.04.01",       "L3",   False, None, None, None, None),
+            ("12.04.01.02.01", "Deep", True,  "C1", "M2", 1.0, 1.0),
+            ("12.04.01.02.1.3", "Deeper", True, "C2", "M2", 1.0, 1.0),
+        ])
+        data_rows = [r for r in transform(items) if r.code is not None]
+        assert [r.item for r in data_rows] == ["012.004.001.002001", "012.004.001.002001003"]
+
     def test_sequential_numbering_under_l3(self):
         """Multiple tasks under the same L3 container get sequential numbers."""
         items = self._make_items([
@@ -360,6 +542,157 @@ class TestRoundTrip:
         assert all_rows[4][1] == "C1"    # code in last row
         wb.close()
 
+    def test_writer_engines_match(self, monkeypatch):
+        """The fast, xlsxwriter and openpyxl writers produce the same cells."""
+        rows = [
+            OutputRow(item="001", description="Header"),
+            OutputRow(item="001.001.001.001", code="C1", description="Task", unit="m2", quantity=5.0, price=10.0),
+        ]
+
+        def _written_values(engine):
+            buf = BytesIO()
+            write_output(rows, buf, engine=engine)
+            buf.seek(0)
+            wb = openpyxl.load_workbook(buf)
+            ws = wb["Planilha"]
+            values = list(ws.iter_rows(values_only=True))
+            wb.close()
+            return values
+
+        fast_values = _written_values("fast")
+        assert _written_values("openpyxl") == fast_values
+        assert _written_values("xlsxwriter") == fast_values
+        monkeypatch.setattr(pipeline, "xlsxwriter", None)
+        assert _written_values("xlsxwriter") == fast_values
+
+    def test_fast_writer_escapes_text(self):
+        """Markup, edge whitespace and control characters survive the fast writer."""
+        rows = [
+            OutputRow(item="001", description='Tubo 1/2" <PVC> & conexões'),
+            OutputRow(item="002", description="  recuo "),
+            OutputRow(item="003", description="linha\x0bquebrada"),
+        ]
+        buf = BytesIO()
+        assert write_output(rows, buf, engine="fast") == 3
+        buf.seek(0)
+
+        wb = openpyxl.load_workbook(buf)
+        descriptions = [r[2] for r in wb.active.iter_rows(min_row=2, values_only=True)]
+        wb.close()
+        assert descriptions[:2] == [rows[0].description, rows[1].description]
+        assert descriptions[2] == "linha_x000B_quebrada"  # Excel's escape, as xlsxwriter writes it
+
+    def test_fast_writer_keeps_literal_escape_text(self):
+        """Text that looks like an _xHHHH_ escape is escaped like xlsxwriter does."""
+        rows = [
+            OutputRow(item="001", description="lit _x0041_ x"),
+            OutputRow(item="002", description="_x005F_"),
+        ]
+
+        def _xml(engine):
+            buf = BytesIO()
+            write_output(rows, buf, engine=engine)
+            with zipfile.ZipFile(buf) as zf:
+                return b"".join(zf.read(name) for name in zf.namelist() if name.endswith(".xml"))
+
+        fast_xml = _xml("fast")
+        assert b"lit _x005F_x0041_ x" in fast_xml
+        assert b"_x005F_x005F_" in fast_xml
+        if pipeline.xlsxwriter is not None:
+            ref_xml = _xml("xlsxwriter")
+            assert b"lit _x005F_x0041_ x" in ref_xml and b"_x005F_x005F_" in ref_xml
+
+    def test_fast_writer_replaces_lone_surrogates(self):
+        rows = [OutputRow(item="001", description="a\ud800b")]
+        buf = BytesIO()
+        assert write_output(rows, buf, engine="fast") == 1
+        buf.seek(0)
+
+        wb = openpyxl.load_workbook(buf)
+        assert wb.active["C2"].value == "a\ufffdb"
+        wb.close()
+
+    def test_unknown_engine_rejected(self):
+        with pytest.raises(ValueError):
+            write_output([], BytesIO(), engine="xls")
+
+    def test_write_output_consumes_generator(self):
+        """iter_transform rows stream into write_output, which returns the row count."""
+        items = [
+            InputItem(raw_item="1", description="L1", code=None, unit=None, price=None, quantity=None),
+            InputItem(raw_item="1.1", description="Task", code="C1", unit="M2", price=1.0, quantity=2.0, is_data=True),
+        ]
+        buf = BytesIO()
+        written = write_output(iter_transform(items), buf)
+        assert written == len(transform(items)) == 4
+
+        buf.seek(0)
+        wb = openpyxl.load_workbook(buf)
+        all_rows = list(wb.active.iter_rows(values_only=True))
+        wb.close()
+        assert [r[0] for r in all_rows[1:]] == [r.item for r in transform(items)]
+
+    def test_convert_file_streams_end_to_end(self, tmp_path):
+        """convert_file matches read_input → transform → write_output."""
+        src = tmp_path / "in.xlsx"
+        src.write_bytes(_make_workbook([
+            ["1",       "Obras",     None, None,  None, None],
+            ["1.1",     "Tarefa L2", "A1", "UND", 2.0,  3.0],
+            ["1.2",     "Grupo",     None, None,  None, None],
+            ["1.2.1",   "Tarefa L3", "B2", "M2",  5.0,  1.0],
+        ]).getvalue())
+        mapping = _default_mapping()
+
+        n_data, n_headers, n_rows = convert_file(str(src), str(tmp_path / "out.xlsx"), mapping)
+
+        expected = transform(read_input(str(src), mapping))
+        assert (n_data, n_headers, n_rows) == (2, 2, len(expected))
+        wb = openpyxl.load_workbook(tmp_path / "out.xlsx")
+        written = list(wb.active.iter_rows(min_row=2, values_only=True))
+        wb.close()
+        assert [r[0] for r in written] == [r.item for r in expected]
+
+    @pytest.mark.parametrize("flag", [[], ["--fast-xlsx"]])
+    def test_main_writer_flag(self, tmp_path, monkeypatch, capsys, flag):
+        """main writes with xlsxwriter by default and fast_xlsx behind --fast-xlsx."""
+        src = tmp_path / "in.xlsx"
+        src.write_bytes(_make_workbook([
+            ["1",   "Obras",     None, None,  None, None],
+            ["1.1", "Tarefa L2", "A1", "UND", 2.0,  3.0],
+        ], start_row=7).getvalue())
+        out = tmp_path / "out.xlsx"
+        calls = []
+        real_write_rows = pipeline.fast_xlsx.write_rows
+        monkeypatch.setattr(pipeline.fast_xlsx, "write_rows",
+                            lambda *a, **k: calls.append(1) or real_write_rows(*a, **k))
+        monkeypatch.setattr(sys, "argv", ["pipeline.py", *flag, str(src), str(out)])
+
+        pipeline.main()
+
+        assert bool(calls) == bool(flag)
+        assert "Done!" in capsys.readouterr().out
+        wb = openpyxl.load_workbook(out)
+        assert wb.active.cell(row=1, column=1).value == "ITEM"
+        wb.close()
+
+    def test_convert_file_to_csv(self, tmp_path):
+        """A .csv output path is written as CSV with the same rows."""
+        src = tmp_path / "in.xlsx"
+        src.write_bytes(_make_workbook([
+            ["1",       "Obras",     None, None,  None, None],
+            ["1.1",     "Tarefa L2", "A1", "UND", 2.0,  3.0],
+        ]).getvalue())
+        mapping = _default_mapping()
+
+        _, _, n_rows = convert_file(str(src), str(tmp_path / "out.csv"), mapping)
+
+        expected = transform(read_input(str(src), mapping))
+        with open(tmp_path / "out.csv", newline="", encoding="utf-8") as f:
+            written = list(csv.reader(f))
+        assert n_rows == len(expected)
+        assert written[0] == pipeline.HEADER_ROW
+        assert [r[0] for r in written[1:]] == [r.item for r in expected]
+
     def test_full_pipeline_with_numeric_values(self):
         """End-to-end: Excel with numeric code/unit → transform → output, no crash."""
         buf = _make_workbook([
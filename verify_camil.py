@@ -1,13 +1,54 @@
 
+import os
+import pickle
 import sys
+from collections import defaultdict
+
 import pipeline
 from pipeline import ColumnMapping
 
+# Parsed items and output rows from the last run, so repeated runs on an
+# unchanged sheet skip the XLSX parse. Pass --no-cache to bypass it.
+CACHE_PATH = 'planilha_camil.cache.pkl'
+
+
+def _cache_key(input_path):
+    # Rebuild when either the sheet or the pipeline code changes
+    return (os.stat(input_path).st_mtime_ns, os.stat(pipeline.__file__).st_mtime_ns)
+
+
+def _load_cache(key):
+    try:
+        with open(CACHE_PATH, 'rb') as f:
+            cached_key, items, output_rows = pickle.load(f)
+    except (OSError, EOFError, ValueError, AttributeError, pickle.UnpicklingError):
+        return None
+    if cached_key != key:
+        return None
+    return items, output_rows
+
+
+def _save_cache(key, items, output_rows):
+    with open(CACHE_PATH, 'wb') as f:
+        pickle.dump((key, items, output_rows), f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
 def main():
     input_path = 'planilha_camil.xlsx'
     output_path = 'planilha_camil_output.xlsx'
 
-    print(f"Reading: {input_path}")
+    # Report lines are collected and written in one call per stage instead
+    # of one print() each; flush() runs before every slow step so progress
+    # still shows up while the sheet is read, transformed and written.
+    out = []
+    say = out.append
+
+    def flush():
+        sys.stdout.write("\n".join(out) + "\n")
+        sys.stdout.flush()
+        out.clear()
+
+    say(f"Reading: {input_path}")
     
     # Correct mapping for planilha_camil.xlsx
     # B=1, D=3 (Desc), E=4 (Code), F=5 (Unit), G=6 (Price), H=7 (Qty)
@@ -21,72 +62,99 @@ def main():
         start_row=7
     )
     
-    items = pipeline.read_input(input_path, mapping)
-    print(f"  {len(items)} items parsed")
+    use_cache = "--no-cache" not in sys.argv[1:]
+    key = _cache_key(input_path)
+    cached = _load_cache(key) if use_cache else None
 
-    data_items = [it for it in items if it.is_data]
-    header_items = [it for it in items if not it.is_data]
-    print(f"  {len(data_items)} data items, {len(header_items)} headers")
+    flush()
+    if cached is not None:
+        items, output_rows = cached
+        say(f"  (loaded from {CACHE_PATH})")
+    else:
+        items = pipeline.read_input(input_path, mapping)
+        output_rows = None
+    say(f"  {len(items)} items parsed")
+
+    data_items, header_items = [], []
+    for it in items:
+        (data_items if it.is_data else header_items).append(it)
+    say(f"  {len(data_items)} data items, {len(header_items)} headers")
 
-    print("Transforming...")
-    output_rows = pipeline.transform(items)
-    print(f"  {len(output_rows)} output rows")
+    say("Transforming...")
+    flush()
+    if output_rows is None:
+        output_rows = pipeline.transform(items)
+        if use_cache:
+            _save_cache(key, items, output_rows)
+    say(f"  {len(output_rows)} output rows")
 
-    data_output = [r for r in output_rows if r.code is not None]
-    print(f"  {len(data_output)} data rows in output")
+    # One pass over the output collects every bucket the checks below need
+    data_output = []
+    flattened = []
+    by_l3 = defaultdict(list)   # keyed by the "NNN.NNN.NNN" prefix
+    l2_002 = []
+    for r in output_rows:
+        if r.code is not None:
+            data_output.append(r)
+        item = r.item
+        # Last of 4 parts with > 3 digits suggests a merge. Padded items are
+        # at least "NNN.NNN.NNN.NNNN" (16 chars), so the length test skips
+        # most rows without splitting them into a list.
+        if len(item) > 15 and item.count('.') == 3 and len(item) - item.rfind('.') > 4:
+            flattened.append(r)
+        by_l3[item[:11]].append(r)
+        if item.startswith("002"):
+            l2_002.append(r)
+    say(f"  {len(data_output)} data rows in output")
     
     # Verification checks
-    print("\n=== Verification ===")
+    say("\n=== Verification ===")
     
     # 1. Check total data items preserved
     if len(data_items) == len(data_output):
-        print(f"[PASS] Data item count matches: {len(data_items)}")
+        say(f"[PASS] Data item count matches: {len(data_items)}")
     else:
-        print(f"[FAIL] Data item count mismatch: In={len(data_items)}, Out={len(data_output)}")
+        say(f"[FAIL] Data item count mismatch: In={len(data_items)}, Out={len(data_output)}")
         
     # 2. Check for flattened items (Level 5+)
     # We expect some items to be merged, e.g. 12.04.01.02.01 -> 12.04.01.0201
-    flattened_count = 0
-    for row in output_rows:
-        parts = row.item.split('.')
-        # Check if last part has > 3 digits, suggesting a merge
-        if len(parts) == 4 and len(parts[3]) > 3:
-            flattened_count += 1
-            if flattened_count <= 5:
-                 print(f"  Found flattened item: {row.item} (Desc: {row.description[:30]}...)")
-
-    print(f"  Total flattened items found: {flattened_count}")
+    for row in flattened[:5]:
+        say(f"  Found flattened item: {row.item} (Desc: {row.description[:30]}...)")
+    flattened_count = len(flattened)
+
+    say(f"  Total flattened items found: {flattened_count}")
     # We expect 16 items at level 5 in input, so roughly 16 flattened items output
     if flattened_count >= 16:
-        print(f"[PASS] Found flattened items (expected ~16, got {flattened_count})")
+        say(f"[PASS] Found flattened items (expected ~16, got {flattened_count})")
     else:
-         print(f"[WARN] Found fewer flattened items than expected (expected ~16, got {flattened_count})")
+         say(f"[WARN] Found fewer flattened items than expected (expected ~16, got {flattened_count})")
          
     # 3. Check Level 2 Task padding
     # e.g. 01.01 -> 001.001.001.001
-    print("\n[INFO] Checking specific examples:")
+    say("\n[INFO] Checking specific examples:")
     
     # Check 01.01 expansion
-    l2_example = [r for r in output_rows if r.item.startswith("001.001.001")]
+    l2_example = by_l3.get("001.001.001", [])
     if l2_example:
-        print("  Found 01.01 expansion:")
+        say("  Found 01.01 expansion:")
         for r in l2_example[:5]:
-            print(f"    {r.item} | {r.description}")
+            say(f"    {r.item} | {r.description}")
     else:
-        print("[FAIL] detailed expansion for 01.01 not found")
+        say("[FAIL] detailed expansion for 01.01 not found")
 
     # Check 002 expansion
-    l2_002 = [r for r in output_rows if r.item.startswith("002")]
     if l2_002:
-        print("  Found 002 expansion:")
+        say("  Found 002 expansion:")
         for r in l2_002[:5]:
-             print(f"    {r.item} | {r.description}")
+             say(f"    {r.item} | {r.description}")
     else:
-        print("[FAIL] detailed expansion for 002 not found")
+        say("[FAIL] detailed expansion for 002 not found")
 
-    print(f"Writing: {output_path}")
+    say(f"Writing: {output_path}")
+    flush()
     pipeline.write_output(output_rows, output_path)
-    print("Done!")
+    say("Done!")
+    flush()
 
 if __name__ == "__main__":
     main()